@@ -1,57 +1,146 @@
 import os
-import json
+import re
+import heapq
+from functools import lru_cache
 import spacy
+import orjson
+import numpy as np
 from flask import Flask, request, jsonify, render_template
+from flask.json.provider import JSONProvider
 from flask_session import Session
 from flask_cors import CORS
-from fuzzywuzzy import process, fuzz
+from cachetools import LRUCache
+from rapidfuzz import process, fuzz, utils
+from health_db import DISEASES, DISEASE_SYMPTOMS, COMMON_SYMPTOMS, SYMPTOM_INDEX, DISEASE_BY_NAME
 
 # ------------------ Flask Setup ------------------
+class OrjsonProvider(JSONProvider):
+    """Use orjson for request.json and jsonify()."""
+
+    # kwargs go straight to orjson (default=, option=); anything else raises TypeError
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes to the response as-is instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 app = Flask(__name__, template_folder="templates", static_folder="static")
+app.json = OrjsonProvider(app)
 app.config["SECRET_KEY"] = "super-secret-key"
 app.config["SESSION_TYPE"] = "filesystem"
 Session(app)
 CORS(app)
 
 # ------------------ Load spaCy Trained Model ------------------
-nlp = spacy.load("symptom_ner_model")
-
-# ------------------ Load Diseases ------------------
-with open("diseases.json", "r", encoding="utf-8") as f:
-    DISEASES = json.load(f)["diseases"]
+# Only the NER is used; it embeds its own tok2vec, so the shared one can go too
+nlp = spacy.load(
+    "symptom_ner_model",
+    disable=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"],
+)
 
 # ------------------ Globals ------------------
-COMMON_SYMPTOMS = list({s.lower() for d in DISEASES for s in d.get("symptoms", [])})
-USER_CONTEXTS = {}
-USER_STATE = {}  # Tracks last disease per user
+# Fuzzy-matching form of the vocabulary, normalized once instead of on every cdist call
+COMMON_SYMPTOMS_NORM = [utils.default_process(s) for s in COMMON_SYMPTOMS]
+# Columns of COMMON_SYMPTOMS belonging to each disease, in DISEASES order, padded
+# with an index one past the vocabulary that points at an all-zero column
+_PAD = len(COMMON_SYMPTOMS)
+_WIDTH = max([len(syms) for syms in DISEASE_SYMPTOMS] + [1])
+DISEASE_SYMPTOM_COLS = np.array(
+    [[SYMPTOM_INDEX[s] for s in syms] + [_PAD] * (_WIDTH - len(syms)) for syms in DISEASE_SYMPTOMS],
+    dtype=np.intp,
+).reshape(len(DISEASES), _WIDTH)
+# Clause boundaries used to split free text into separate NER inputs
+_SPLIT_RE = re.compile(r"[;\r\n]+")
+MATCH_THRESHOLD = 70  # fuzzy score at which a symptom counts as matched
+YES_WORDS = frozenset({"yes", "yeah", "yup", "ok", "okay"})
+NO_WORDS = frozenset({"no", "nope", "nah"})
+GREETINGS = frozenset({"hi", "hello", "hey", "thanks", "thank you"})
+SMALL_TALK = YES_WORDS | NO_WORDS | GREETINGS  # never carries symptoms
+MAX_USERS = 10_000  # least recently active users are evicted past this
+MAX_HISTORY = 8  # messages kept per user after the opening greeting
+USER_CONTEXTS = LRUCache(maxsize=MAX_USERS)
+USER_STATE = LRUCache(maxsize=MAX_USERS)  # Tracks last disease per user
 
 # ------------------ Utilities ------------------
 def normalize(text: str) -> str:
     return text.lower().strip()
 
+def extract_symptoms_batch(texts):
+    # Single process on purpose: forking spaCy workers per request costs more than it saves
+    return [
+        [ent.text.lower().strip() for ent in doc.ents if ent.label_ == "SYMPTOM"]
+        for doc in nlp.pipe(texts, batch_size=64)
+    ]
+
+# Keyed on the raw text; call cache_clear() if nlp is ever reloaded
+@lru_cache(maxsize=1024)
+def _extract_symptoms_cached(text: str):
+    parts = [part for part in _SPLIT_RE.split(text) if part.strip()]
+    symptoms = [s for found in extract_symptoms_batch(parts) for s in found]
+    return tuple(dict.fromkeys(symptoms))
+
 def extract_symptoms(text: str):
-    doc = nlp(text)
-    symptoms = [ent.text.lower().strip() for ent in doc.ents if ent.label_ == "SYMPTOM"]
-    return list(set(symptoms))
+    if len(text.strip()) < 3 or normalize(text) in SMALL_TALK:
+        return []
+    return list(_extract_symptoms_cached(text))
+
+def _vocabulary_scores(symptoms) -> np.ndarray:
+    """Fuzzy scores of each symptom against the whole symptom vocabulary."""
+    # No score_cutoff: near-miss scores feed the average in diagnose()'s composite
+    scores = process.cdist(
+        [utils.default_process(s) for s in symptoms], COMMON_SYMPTOMS_NORM,
+        scorer=fuzz.token_sort_ratio, processor=None,
+        dtype=np.float64,
+    )
+    # Round half to even like fuzzywuzzy's int(round(x)); an integer dtype would round .5 up
+    return np.rint(scores).astype(np.uint8)
+
+def _best_per_disease(scores: np.ndarray) -> np.ndarray:
+    """Reduce vocabulary scores to the best score per disease, in DISEASES order."""
+    padded = np.pad(scores, ((0, 0), (0, 1)))
+    # (symptoms, diseases, symptoms per disease) -> (symptoms, diseases)
+    return padded[:, DISEASE_SYMPTOM_COLS].max(axis=2)
+
+@lru_cache(maxsize=4096)
+def _fuzzy_symptom_scores(symptom: str) -> np.ndarray:
+    scores = _best_per_disease(_vocabulary_scores([symptom]))[0]
+    scores.setflags(write=False)  # shared by every caller through the cache
+    return scores
+
+def symptom_disease_scores(symptom: str) -> np.ndarray:
+    """Best fuzzy score of one symptom against each disease, in DISEASES order."""
+    index = SYMPTOM_INDEX.get(symptom)
+    if index is not None:
+        return KNOWN_SYMPTOM_SCORES[index]
+    return _fuzzy_symptom_scores(symptom)
+
+# Symptoms already in the vocabulary never hit fuzzy matching at request time
+KNOWN_SYMPTOM_SCORES = _best_per_disease(_vocabulary_scores(COMMON_SYMPTOMS))
+KNOWN_SYMPTOM_SCORES.setflags(write=False)
 
 def diagnose(symptoms, top_k=3):
-    results = []
-    for d in DISEASES:
-        disease_symptoms = [s.lower() for s in d.get("symptoms", [])]
-        scores = []
-        for s in symptoms:
-            match = process.extractOne(s, disease_symptoms, scorer=fuzz.token_sort_ratio)
-            if match:
-                scores.append(match[1])
-        good = sum(1 for sc in scores if sc >= 70)
-        avg = sum(scores) / len(scores) if scores else 0
-        composite = good * 10 + avg / 10
-        results.append({**d, "score": round(composite, 2)})
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    if symptoms:
+        # rows: user symptoms, columns: diseases
+        matrix = np.stack([symptom_disease_scores(s) for s in symptoms])
+        good = (matrix >= MATCH_THRESHOLD).sum(axis=0)
+        avg = matrix.mean(axis=0)
+        composite = np.round(good * 10 + avg / 10, 2)
+    else:
+        composite = np.zeros(len(DISEASES))
+    # nlargest keeps ties in the order sorted() gave them, so results match the old full sort
+    top = heapq.nlargest(top_k, range(len(DISEASES)), key=composite.__getitem__)
+    return [{**DISEASES[i], "score": float(composite[i])} for i in top]
 
 def get_disease_by_name(name: str):
     name = normalize(name)
+    if name in DISEASE_BY_NAME:
+        return DISEASE_BY_NAME[name]
     for d in DISEASES:
         if normalize(d["name"]) in name or name in normalize(d["name"]):
             return d
@@ -74,10 +163,12 @@ def chat():
         ]
 
     history = USER_CONTEXTS[user_id]
+    # Leave room for this user message and the reply below, so MAX_HISTORY holds between requests
+    del history[1:max(1, len(history) - MAX_HISTORY + 2)]
     history.append({"role": "user", "content": user_input})
 
     # ✅ If user said "yes" to remedies
-    if user_input.lower() in ["yes", "yeah", "yup", "ok", "okay"]:
+    if user_input.lower() in YES_WORDS:
         last_disease = USER_STATE.get(user_id)
         if last_disease:
             info = get_disease_by_name(last_disease)
@@ -131,4 +222,5 @@ def chat():
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
     print(f"🚀 Running on http://0.0.0.0:{port}")
-    app.run(host="0.0.0.0", port=port)
+    # No reloader: it would spawn a second process and load the spaCy model twice
+    app.run(host="0.0.0.0", port=port, debug=False, use_reloader=False)
@@ -0,0 +1,9 @@
+import os
+
+# ------------------ Gunicorn Settings ------------------
+# Load spaCy and DISEASES once in the master; forked workers share those pages copy-on-write
+preload_app = True
+
+# Fixed default: os.cpu_count() reports the host's CPUs inside containers, not the quota
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+timeout = 120
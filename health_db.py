@@ -0,0 +1,17 @@
+import mmap
+import orjson
+
+# ------------------ Load Diseases ------------------
+# Parsed straight from a read-only mapping, so the raw file is never copied into a Python str
+with open("diseases.json", "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    with memoryview(mm) as view:
+        DISEASES = orjson.loads(view)["diseases"]
+
+# ------------------ Derived Lookups ------------------
+# Lowercased symptoms of each disease, in DISEASES order
+DISEASE_SYMPTOMS = [[s.lower().strip() for s in d.get("symptoms", [])] for d in DISEASES]
+# Every distinct symptom, in first-seen order
+COMMON_SYMPTOMS = list(dict.fromkeys(s for syms in DISEASE_SYMPTOMS for s in syms))
+SYMPTOM_INDEX = {s: i for i, s in enumerate(COMMON_SYMPTOMS)}
+# Built in reverse so that, as with a linear scan, the first entry wins for duplicate names
+DISEASE_BY_NAME = {d["name"].lower().strip(): d for d in reversed(DISEASES)}
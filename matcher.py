@@ -1,6 +1,11 @@
 import spacy
+from spacy.matcher import PhraseMatcher
 
-nlp = spacy.load("en_core_web_sm")
+# Matching only needs the tokenizer, so skip every trained component
+nlp = spacy.load(
+    "en_core_web_sm",
+    disable=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"],
+)
 
 COMMON_SYMPTOMS = [
     "fever", "cough", "fatigue", "headache", "nausea", "vomiting",
@@ -11,17 +16,10 @@ COMMON_SYMPTOMS = [
     "itchy eyes", "sneezing", "watery eyes", "runny nose", "nasal congestion"
 ]
 
+matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+matcher.add("SYMPTOM", [nlp.make_doc(s) for s in COMMON_SYMPTOMS])
+
 def extract_symptoms(text: str):
-    """Extract symptoms from free text using spaCy + keyword matching"""
+    """Extract symptoms from free text using spaCy phrase matching"""
     doc = nlp(text)
-    extracted = []
-
-    for token in doc:
-        if token.text.lower() in COMMON_SYMPTOMS:
-            extracted.append(token.text.lower())
-
-    for chunk in doc.noun_chunks:
-        if chunk.text.lower() in COMMON_SYMPTOMS:
-            extracted.append(chunk.text.lower())
-
-    return list(set(extracted))
+    return list(dict.fromkeys(doc[start:end].text.lower() for _, start, end in matcher(doc)))